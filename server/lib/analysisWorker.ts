@@ -0,0 +1,114 @@
+import { spawn, ChildProcessWithoutNullStreams } from 'child_process';
+import path from 'path';
+import fs from 'fs';
+
+// Long-running sequential analysis workers.
+//
+// Spawning sequential_analysis.py per image made every request pay the full
+// YOLO weight deserialization cost (hundreds of ms to seconds) before the two
+// inferences even started. Instead we spawn the script once in --serve mode,
+// keep its stdin pipe open, and write one image path per line; the worker
+// replies with length-prefixed JSON frames (4-byte big-endian length, then
+// the payload). Requests on a single worker are answered in order, so
+// responses are matched FIFO.
+
+const WORKER_COUNT = Math.max(1, parseInt(process.env.ANALYSIS_WORKERS || '1', 10) || 1);
+
+interface PendingRequest {
+  resolve: (result: any) => void;
+  reject: (error: Error) => void;
+}
+
+class AnalysisWorker {
+  private process: ChildProcessWithoutNullStreams | null = null;
+  private pending: PendingRequest[] = [];
+  private stdoutBuffer = Buffer.alloc(0);
+
+  constructor(private readonly index: number) {}
+
+  private start(): boolean {
+    const scriptPath = path.join(process.cwd(), 'server/scripts/sequential_analysis.py');
+    const poseModelPath = path.join(process.cwd(), 'rooster_pose_model.pt');
+    const injuryModelPath = path.join(process.cwd(), 'rooster_bumblefoot_model.pt');
+
+    if (!fs.existsSync(scriptPath) || !fs.existsSync(poseModelPath) || !fs.existsSync(injuryModelPath)) {
+      return false;
+    }
+
+    console.log(`Starting analysis worker ${this.index}...`);
+    const env = { ...process.env };
+    if (WORKER_COUNT > 1 && !process.env.CUDA_VISIBLE_DEVICES) {
+      // One worker per GPU: pin each worker to its own device so they never
+      // contend for the same one (no-op on CPU-only hosts)
+      env.CUDA_VISIBLE_DEVICES = String(this.index);
+    }
+    this.process = spawn('python', [scriptPath, '--serve', poseModelPath, injuryModelPath], { env });
+    this.stdoutBuffer = Buffer.alloc(0);
+
+    this.process.stdout.on('data', (data: Buffer) => {
+      this.stdoutBuffer = Buffer.concat([this.stdoutBuffer, data]);
+      // Each response is a 4-byte big-endian length followed by JSON bytes
+      while (this.stdoutBuffer.length >= 4) {
+        const frameLength = this.stdoutBuffer.readUInt32BE(0);
+        if (this.stdoutBuffer.length < 4 + frameLength) break;
+
+        const payload = this.stdoutBuffer.subarray(4, 4 + frameLength).toString();
+        this.stdoutBuffer = this.stdoutBuffer.subarray(4 + frameLength);
+
+        const request = this.pending.shift();
+        if (!request) {
+          console.warn(`Analysis worker ${this.index} emitted unexpected output:`, payload);
+          continue;
+        }
+
+        try {
+          request.resolve(JSON.parse(payload));
+        } catch (parseError) {
+          request.reject(new Error(`Failed to parse analysis result: ${payload}`));
+        }
+      }
+    });
+
+    this.process.stderr.on('data', (data) => {
+      console.error(`Analysis worker ${this.index} stderr:`, data.toString());
+    });
+
+    this.process.on('close', (code) => {
+      console.error(`Analysis worker ${this.index} exited with code ${code}`);
+      this.process = null;
+      // Fail anything still in flight; the next request respawns the worker
+      const failed = this.pending;
+      this.pending = [];
+      failed.forEach(request => request.reject(new Error(`Analysis worker exited with code ${code}`)));
+    });
+
+    return true;
+  }
+
+  analyze(imagePath: string): Promise<any> {
+    if (!this.process && !this.start()) {
+      return Promise.reject(new Error('Analysis worker could not start (script or models missing)'));
+    }
+
+    return new Promise((resolve, reject) => {
+      this.pending.push({ resolve, reject });
+      this.process!.stdin.write(imagePath + '\n');
+    });
+  }
+}
+
+const workers: AnalysisWorker[] = [];
+let nextWorker = 0;
+
+// Run sequential analysis on an image via the worker pool (round-robin dispatch)
+export function runSequentialAnalysis(imagePath: string): Promise<any> {
+  if (workers.length === 0) {
+    for (let i = 0; i < WORKER_COUNT; i++) {
+      workers.push(new AnalysisWorker(i));
+    }
+  }
+
+  const worker = workers[nextWorker];
+  nextWorker = (nextWorker + 1) % workers.length;
+  return worker.analyze(imagePath);
+}
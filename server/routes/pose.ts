@@ -1,9 +1,9 @@
 import { Router } from 'express';
 import multer from 'multer';
-import { spawn } from 'child_process';
 import path from 'path';
 import fs from 'fs';
 import { fileURLToPath } from 'url';
+import { runSequentialAnalysis } from '../lib/analysisWorker';
 
 // Fix __dirname for ES modules
 const __filename = fileURLToPath(import.meta.url);
@@ -210,89 +210,53 @@ router.post('/detect', upload.single('image'), async (req, res) => {
       });
     }
 
-    // Execute sequential analysis with bumblefoot model
-    const python = spawn('python', [sequentialScriptPath, imagePath, modelPath, bumblefootModelPath]);
-    let output = '';
-    let error = '';
-
-    python.stdout.on('data', (data) => {
-      output += data.toString();
-    });
-
-    python.stderr.on('data', (data) => {
-      error += data.toString();
-    });
-
-    python.on('close', (code) => {
+    // Execute sequential analysis on the long-running worker pool
+    let result;
+    try {
+      result = await runSequentialAnalysis(imagePath);
+    } finally {
       // Clean up uploaded file
       fs.unlinkSync(imagePath);
+    }
 
-      console.log('Python output:', output);
-      console.log('Python error:', error);
-      console.log('Exit code:', code);
+    if (result.success) {
+      // Sequential analysis completed successfully
+      const response = {
+        success: true,
+        analysis_type: result.analysis_type || 'sequential_validation',
+        overall_status: result.overall_status,
 
-      if (code !== 0) {
-        return res.status(500).json({
-          success: false,
-          error: `Pose detection failed: ${error}`
-        });
-      }
+        // Pose detection results (for backward compatibility)
+        keypoints: result.pose_detection?.keypoints || [],
+        confidence: result.pose_detection?.pose_confidence || 0,
 
-      try {
-        // Find JSON in output (might have other text before/after)
-        const jsonMatch = output.match(/\{.*\}/s);
-        if (!jsonMatch) {
-          throw new Error('No JSON found in output');
-        }
-        
-        const result = JSON.parse(jsonMatch[0]);
-        
-        if (result.success) {
-          // Sequential analysis completed successfully
-          const response = {
-            success: true,
-            analysis_type: result.analysis_type || 'sequential_validation',
-            overall_status: result.overall_status,
-            
-            // Pose detection results (for backward compatibility)
-            keypoints: result.pose_detection?.keypoints || [],
-            confidence: result.pose_detection?.pose_confidence || 0,
-            
-            // Enhanced sequential results
-            pose_detection: result.pose_detection,
-            injury_classification: result.injury_classification,
-            combined_analysis: {
-              health_assessment: result.health_assessment,
-              combined_confidence: result.combined_confidence,
-              recommendations: result.recommendations,
-              specific_findings: result.specific_findings
-            },
-            
-            // Legacy injury analysis (for backward compatibility)
-            injury_analysis: {
-              risk_level: result.health_assessment === 'injured' ? 'high' : 'low',
-              detected_issues: result.specific_findings || [],
-              recommendations: result.recommendations || []
-            }
-          };
+        // Enhanced sequential results
+        pose_detection: result.pose_detection,
+        injury_classification: result.injury_classification,
+        combined_analysis: {
+          health_assessment: result.health_assessment,
+          combined_confidence: result.combined_confidence,
+          recommendations: result.recommendations,
+          specific_findings: result.specific_findings
+        },
 
-          res.json(response);
-        } else {
-          // Analysis failed
-          res.status(500).json({
-            success: false,
-            error: result.error || 'Sequential analysis failed',
-            stage: result.stage || 'unknown'
-          });
+        // Legacy injury analysis (for backward compatibility)
+        injury_analysis: {
+          risk_level: result.health_assessment === 'injured' ? 'high' : 'low',
+          detected_issues: result.specific_findings || [],
+          recommendations: result.recommendations || []
         }
-      } catch (parseError) {
-        console.error('Parse error:', parseError);
-        res.status(500).json({
-          success: false,
-          error: `Failed to parse sequential analysis results: ${parseError.message}. Output: ${output}`
-        });
-      }
-    });
+      };
+
+      res.json(response);
+    } else {
+      // Analysis failed
+      res.status(500).json({
+        success: false,
+        error: result.error || 'Sequential analysis failed',
+        stage: result.stage || 'unknown'
+      });
+    }
 
   } catch (error) {
     console.error('Pose detection error:', error);
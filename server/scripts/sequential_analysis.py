@@ -8,16 +8,41 @@ This script provides the core sequential validation logic:
 3. Stage 3: Combined analysis and recommendations
 
 Usage:
+    # One-shot mode (single image, then exit)
     python sequential_analysis.py <image_path> <pose_model_path> <injury_model_path>
+
+    # Worker mode (models loaded once, image paths read from stdin,
+    # length-prefixed JSON frames written to stdout)
+    python sequential_analysis.py --serve <pose_model_path> <injury_model_path>
 """
 
 import sys
 import json
+import hashlib
 import os
-from pathlib import Path
+import queue
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
 from typing import Dict, List, Optional, Tuple
+
+import cv2
+import numpy as np
+import torch
 from ultralytics import YOLO
 
+try:
+    import orjson
+except ImportError:
+    orjson = None  # Fall back to stdlib json
+
+try:
+    from numba import njit
+except ImportError:
+    njit = None  # Geometric checks run as plain NumPy/Python
+
 # Keypoint names for pose detection (17 keypoints)
 KEYPOINT_NAMES = [
     'beak_tip', 'eye', 'comb_top', 'neck_base', 'chest', 'back_mid', 'tail_base',
@@ -26,10 +51,235 @@ KEYPOINT_NAMES = [
     'left_leg_joint', 'left_foot', 'right_leg_joint', 'right_foot'
 ]
 
+# Keypoint indices used by the geometric injury checks (fixed positions in
+# KEYPOINT_NAMES, so no name lookups are needed on the hot path)
+CHEST = 4
+L_WING_TIP = 9
+R_WING_TIP = 12
+L_FOOT = 14
+R_FOOT = 16
+
 # Quality gate thresholds (optimized for better acceptance rate)
 POSE_CONFIDENCE_THRESHOLD = 0.65  # Reduced from 0.80 for better acceptance
 MIN_KEYPOINTS_DETECTED = 12        # Reduced from 15 for better acceptance
 
+# Micro-batching limits for worker mode: requests arriving within the wait
+# window share one forward pass per model instead of running at batch=1
+MAX_BATCH = 8
+MAX_WAIT_MS = 10
+
+# Bounded LRU of completed analyses keyed by image content hash - re-uploads
+# and retries of the same image skip both forward passes entirely
+CACHE_SIZE = 1024
+
+# Canonical recommendations per classification, shared by the sequential and
+# close-up paths (tuples so the shared copies are never mutated in place)
+RECOMMENDATIONS: Dict[str, Tuple[str, ...]] = {
+    'bumblefoot': (
+        'BUMBLEFOOT DETECTED - Immediate attention required',
+        'Examine foot pads for swelling, heat, or black scabs',
+        'Check for limping or favoring one foot',
+        'Isolate bird to prevent spread and allow treatment',
+        'Consult veterinarian for proper bumblefoot treatment',
+        'Clean and disinfect coop areas, especially perches',
+        'Review perch design - avoid sharp edges or rough surfaces'
+    ),
+    'comb_injury': (
+        '🐓 COMB/WATTLE INJURY DETECTED - Attention required',
+        'Examine comb and wattles for wounds, tears, or bleeding',
+        'Check for signs of fighting or pecking from other birds',
+        'Clean wounds with antiseptic solution',
+        'Apply antibiotic ointment to prevent infection',
+        'Isolate bird if injury is severe or bleeding',
+        'Monitor for signs of infection (swelling, pus, heat)',
+        'Consult veterinarian if injury does not improve in 2-3 days'
+    ),
+    'feather_loss': (
+        '🪶 FEATHER LOSS DETECTED - Investigation needed',
+        'Check for external parasites (mites, lice)',
+        'Examine for signs of pecking or bullying from flock mates',
+        'Assess nutrition - ensure adequate protein (16-20%)',
+        'Consider molting season (normal seasonal feather loss)',
+        'Check for skin irritation or infection under bare patches',
+        'Improve coop ventilation and reduce stress factors',
+        'Provide dust bath area for parasite control',
+        'Consult veterinarian if feather loss is severe or spreading'
+    ),
+    'wing_injury': (
+        'WING INJURY DETECTED - Immediate attention required',
+        'Check for wing drooping, asymmetry, or limited movement',
+        'Examine wing joints for swelling, heat, or pain',
+        'Look for fractures, dislocations, or sprains',
+        'Restrict movement - confine to small, quiet area',
+        'Avoid handling the injured wing excessively',
+        'Consult veterinarian for proper diagnosis and treatment',
+        'May require splinting or bandaging by professional',
+        'Monitor for signs of infection or worsening condition'
+    ),
+    'healthy': (
+        'Rooster appears healthy based on AI analysis',
+        'Continue regular health monitoring',
+        'Maintain good nutrition and housing conditions',
+        'Schedule routine veterinary check-ups',
+        'Monitor for early signs of injury or illness',
+        'Ensure clean water and balanced diet',
+        'Provide adequate space and enrichment'
+    ),
+}
+
+# Default specific finding per classification
+FINDINGS: Dict[str, str] = {
+    'bumblefoot': 'Bumblefoot detected in foot area',
+    'comb_injury': 'Head/comb area shows abnormalities',
+    'feather_loss': 'Visible feather loss or bare patches detected',
+    'wing_injury': 'Wing abnormality detected',
+    'healthy': 'No visible health issues detected',
+}
+
+
+@dataclass(slots=True)
+class PoseResult:
+    """Stage 1 outcome; slotted so per-request allocations stay small"""
+    success: bool
+    quality_gate_passed: bool = False
+    pose_confidence: float = 0.0
+    keypoints_detected: int = 0
+    keypoints: List[Dict] = field(default_factory=list)
+    quality_assessment: Optional[str] = None
+    error: Optional[str] = None
+    # Raw [17, 3] keypoint array for the geometric checks; never serialized
+    keypoints_data: Optional[np.ndarray] = None
+
+    def to_dict(self) -> Dict:
+        """Serialize to the JSON shape the Node consumer expects"""
+        if not self.success:
+            return {
+                'success': False,
+                'stage': 'pose_detection',
+                'error': self.error,
+                'quality_gate_passed': False
+            }
+        return {
+            'success': True,
+            'stage': 'pose_detection',
+            'keypoints': self.keypoints,
+            'pose_confidence': self.pose_confidence,
+            'keypoints_detected': self.keypoints_detected,
+            'quality_gate_passed': self.quality_gate_passed,
+            'quality_assessment': self.quality_assessment
+        }
+
+
+@dataclass(slots=True)
+class InjuryResult:
+    """Stage 2 outcome; slotted so per-request allocations stay small"""
+    success: bool
+    classification: Optional[str] = None
+    confidence: float = 0.0
+    probabilities: Optional[Dict[str, float]] = None
+    error: Optional[str] = None
+    skipped: bool = False
+
+    def to_dict(self) -> Dict:
+        """Serialize to the JSON shape the Node consumer expects"""
+        if not self.success:
+            result = {
+                'success': False,
+                'stage': 'injury_classification',
+                'error': self.error
+            }
+            if self.skipped:
+                result['skipped'] = True
+            return result
+        return {
+            'success': True,
+            'stage': 'injury_classification',
+            'classification': self.classification,
+            'confidence': self.confidence,
+            'probabilities': self.probabilities
+        }
+
+
+def _pose_injury_flags(kp_xy, kp_conf):
+    """Geometric injury checks over a batch of keypoint arrays
+
+    kp_xy is float32 [B, 17, 2], kp_conf is float32 [B, 17]. Returns two bool
+    arrays of shape [B]: wing asymmetry and uneven leg positioning. Written as
+    an explicit scalar loop so Numba can JIT it when available.
+    """
+    batch_size = kp_xy.shape[0]
+    wing_asymmetry = np.zeros(batch_size, dtype=np.bool_)
+    uneven_legs = np.zeros(batch_size, dtype=np.bool_)
+
+    for b in range(batch_size):
+        # Check wing symmetry
+        if kp_conf[b, CHEST] > 0.5 and kp_conf[b, L_WING_TIP] > 0.5 and kp_conf[b, R_WING_TIP] > 0.5:
+            left_wing_drop = kp_xy[b, L_WING_TIP, 1] - kp_xy[b, CHEST, 1]
+            right_wing_drop = kp_xy[b, R_WING_TIP, 1] - kp_xy[b, CHEST, 1]
+            if abs(left_wing_drop - right_wing_drop) > 30:  # pixels
+                wing_asymmetry[b] = True
+
+        # Check leg positioning
+        if kp_conf[b, L_FOOT] > 0.5 and kp_conf[b, R_FOOT] > 0.5:
+            if abs(kp_xy[b, L_FOOT, 1] - kp_xy[b, R_FOOT, 1]) > 25:  # pixels
+                uneven_legs[b] = True
+
+    return wing_asymmetry, uneven_legs
+
+
+if njit is not None:
+    _pose_injury_flags = njit(cache=True, fastmath=True)(_pose_injury_flags)
+
+
+def ensure_trt_engine(pt_path: str) -> str:
+    """Export a .pt model to a TensorRT FP16 engine if one is not already present
+
+    TensorRT fuses conv+bn+activation, runs FP16 on tensor cores and skips
+    PyTorch dispatch overhead - roughly 2x faster than the raw .pt graph.
+    Returns the .pt path unchanged on CPU-only hosts or if the export fails.
+    """
+    engine_path = pt_path.replace('.pt', '.engine')
+    if os.path.exists(engine_path):
+        return engine_path
+
+    try:
+        import torch
+        if not torch.cuda.is_available():
+            return pt_path
+
+        # Dynamic batch dimension so the engine serves both single requests
+        # and micro-batched forward passes up to MAX_BATCH
+        YOLO(pt_path).export(format='engine', half=True, dynamic=True, batch=MAX_BATCH, workspace=4)
+        if os.path.exists(engine_path):
+            return engine_path
+    except Exception as e:
+        print(f'TensorRT export failed for {pt_path}, using .pt weights: {e}', file=sys.stderr)
+
+    return pt_path
+
+
+def resolve_injury_weights(pt_path: str) -> str:
+    """Pick the fastest available weights for the injury classifier
+
+    The classifier head tolerates INT8 well, and on CPU-only deploys it is the
+    dominant cost. Preference order:
+      1. TensorRT engine (GPU hosts; exported on first start)
+      2. OpenVINO INT8 export, produced at build time with
+         `yolo export model=<pt> format=openvino int8=True data=<calib.yaml>`
+         against a small calibration set of rooster images
+      3. Plain OpenVINO FP32 export
+      4. The original .pt weights
+    """
+    weights = ensure_trt_engine(pt_path)
+    if weights != pt_path:
+        return weights
+
+    base = pt_path[:-3] if pt_path.endswith('.pt') else pt_path
+    for candidate in (base + '_int8_openvino_model', base + '_openvino_model'):
+        if os.path.isdir(candidate):
+            return candidate
+    return pt_path
+
 
 class SequentialAnalyzer:
     """Sequential AI validation system for rooster health analysis"""
@@ -39,166 +289,201 @@ class SequentialAnalyzer:
         self.injury_model_path = injury_model_path
         self.pose_model = None
         self.injury_model = None
-        
+        self.pose_stream = None
+        self.injury_stream = None
+        self._cache: OrderedDict = OrderedDict()
+        # Decode pool: JPEG read+decode for a batch runs in parallel off the
+        # inference thread. OpenCV's own threading is capped so four
+        # concurrent decodes do not oversubscribe the cores the models use.
+        cv2.setNumThreads(1)
+        self._decode_pool = ThreadPoolExecutor(max_workers=4)
+        # Load both models once up front - YOLO weight deserialization dominates
+        # cold-start latency, so it must not happen per-image in worker mode
+        self.models_loaded = self.load_models()
+
     def load_models(self) -> bool:
         """Load both AI models"""
         try:
-            # Load pose detection model
+            # Inference-only process: drop autograd bookkeeping globally and
+            # let cuDNN benchmark kernel choices (locked in by warmup())
+            torch.set_grad_enabled(False)
+            torch.backends.cudnn.benchmark = True
+            if torch.cuda.is_available():
+                torch.backends.cuda.matmul.allow_tf32 = True
+
+            # Load pose detection model (TensorRT engine when available).
+            # Passing task= explicitly skips ultralytics' model-type probing.
             if not os.path.exists(self.pose_model_path):
                 raise FileNotFoundError(f"Pose model not found: {self.pose_model_path}")
-            self.pose_model = YOLO(self.pose_model_path)
-            
-            # Load injury classification model
+            pose_weights = ensure_trt_engine(self.pose_model_path)
+            self.pose_model = YOLO(pose_weights, task='pose')
+
+            # Load injury classification model (quantized export when available)
             if not os.path.exists(self.injury_model_path):
                 raise FileNotFoundError(f"Injury model not found: {self.injury_model_path}")
-            self.injury_model = YOLO(self.injury_model_path)
-            
+            injury_weights = resolve_injury_weights(self.injury_model_path)
+            self.injury_model = YOLO(injury_weights, task='classify')
+
+            # Conv+BN fusion for the non-TensorRT fallback; exported engines
+            # are already fused at build time
+            if torch.cuda.is_available():
+                if pose_weights.endswith('.pt'):
+                    self.pose_model.fuse()
+                if injury_weights.endswith('.pt'):
+                    self.injury_model.fuse()
+
+            # Separate CUDA streams let the pose and injury forward passes
+            # overlap on GPU hosts (see analyze_batch)
+            if torch.cuda.is_available():
+                self.pose_stream = torch.cuda.Stream()
+                self.injury_stream = torch.cuda.Stream()
+
             return True
         except Exception as e:
+            # Goes to stderr: in --serve mode stdout carries length-prefixed
+            # frames, and an unframed blob would be misread as a frame header
             print(json.dumps({
                 'success': False,
                 'error': f'Failed to load models: {str(e)}',
                 'stage': 'model_loading'
-            }))
+            }), file=sys.stderr)
             return False
     
-    def stage1_pose_detection(self, image_path: str) -> Dict:
-        """Stage 1: Pose detection with quality assessment"""
+    def warmup(self):
+        """Run one dummy forward pass per model before serving traffic
+
+        First-call lazy initialization and cuDNN benchmark autotuning are paid
+        here instead of on the first real request.
+        """
+        if not self.models_loaded:
+            return
+        try:
+            dummy = np.zeros((640, 640, 3), dtype=np.uint8)
+            with torch.inference_mode():
+                self.pose_model(dummy, verbose=False)
+                self.injury_model(dummy, verbose=False)
+        except Exception as e:
+            print(f'Model warmup failed: {e}', file=sys.stderr)
+
+    def _process_pose_result(self, result) -> PoseResult:
+        """Extract keypoints and quality gate decision from a pose Results object"""
         try:
-            results = self.pose_model(image_path)
-            
-            if not results or len(results) == 0:
-                return {
-                    'success': False,
-                    'stage': 'pose_detection',
-                    'error': 'No detection results',
-                    'quality_gate_passed': False
-                }
-            
-            result = results[0]
-            
             # Extract keypoints if available
             if result.keypoints is not None and len(result.keypoints.data) > 0:
-                keypoints_data = result.keypoints.data[0].cpu().numpy()
-                keypoints = []
-                keypoints_detected = 0
-                
-                for i, (x, y, conf) in enumerate(keypoints_data):
-                    if i < len(KEYPOINT_NAMES):
-                        kp = {
-                            'name': KEYPOINT_NAMES[i],
-                            'x': float(x),
-                            'y': float(y),
-                            'confidence': float(conf)
-                        }
-                        keypoints.append(kp)
-                        
-                        # Count high-confidence keypoints
-                        if conf > 0.5:
-                            keypoints_detected += 1
-                
+                keypoints_tensor = result.keypoints.data[0]
+
+                # Evaluate the quality gate on-device first: counting
+                # high-confidence keypoints only needs the confidence column,
+                # so the full device->host copy can wait until we know the
+                # keypoints are actually worth materializing
+                kp_conf = keypoints_tensor[:len(KEYPOINT_NAMES), 2]
+                keypoints_detected = int((kp_conf > 0.5).sum().item())
+
                 # Get overall pose confidence
                 pose_confidence = float(result.boxes.conf[0]) if result.boxes is not None and len(result.boxes.conf) > 0 else 0.0
-                
+
                 # Quality gate assessment
                 quality_gate_passed = (
-                    pose_confidence >= POSE_CONFIDENCE_THRESHOLD and 
+                    pose_confidence >= POSE_CONFIDENCE_THRESHOLD and
                     keypoints_detected >= MIN_KEYPOINTS_DETECTED
                 )
-                
-                return {
-                    'success': True,
-                    'stage': 'pose_detection',
-                    'keypoints': keypoints,
-                    'pose_confidence': pose_confidence,
-                    'keypoints_detected': keypoints_detected,
-                    'quality_gate_passed': quality_gate_passed,
-                    'quality_assessment': self._assess_pose_quality(pose_confidence, keypoints_detected)
-                }
+
+                keypoints_data = None
+                if keypoints_detected == 0:
+                    # Nothing downstream consumes the raw points (the adaptive
+                    # close-up path discards pose data entirely) - skip the copy
+                    keypoints = []
+                else:
+                    keypoints_data = keypoints_tensor.cpu().numpy()
+                    xs = keypoints_data[:len(KEYPOINT_NAMES), 0]
+                    ys = keypoints_data[:len(KEYPOINT_NAMES), 1]
+                    cs = keypoints_data[:len(KEYPOINT_NAMES), 2]
+                    keypoints = [
+                        {'name': name, 'x': float(x), 'y': float(y), 'confidence': float(c)}
+                        for name, x, y, c in zip(KEYPOINT_NAMES, xs, ys, cs)
+                    ]
+
+                return PoseResult(
+                    success=True,
+                    quality_gate_passed=quality_gate_passed,
+                    pose_confidence=pose_confidence,
+                    keypoints_detected=keypoints_detected,
+                    keypoints=keypoints,
+                    quality_assessment=self._assess_pose_quality(pose_confidence, keypoints_detected),
+                    keypoints_data=keypoints_data
+                )
             else:
-                return {
-                    'success': False,
-                    'stage': 'pose_detection',
-                    'error': 'No keypoints detected',
-                    'quality_gate_passed': False
-                }
-                
+                return PoseResult(success=False, error='No keypoints detected')
+
         except Exception as e:
-            return {
-                'success': False,
-                'stage': 'pose_detection',
-                'error': str(e),
-                'quality_gate_passed': False
-            }
-    
-    def stage2_injury_classification(self, image_path: str, pose_result: Dict) -> Dict:
-        """Stage 2: Injury classification (only if quality gate passed)"""
-        if not pose_result.get('quality_gate_passed', False):
-            return {
-                'success': False,
-                'stage': 'injury_classification',
-                'error': 'Skipped due to insufficient pose quality',
-                'skipped': True
-            }
-        
+            return PoseResult(success=False, error=str(e))
+
+    def stage2_injury_classification(self, image_path: str, pose_result: PoseResult, result=None) -> InjuryResult:
+        """Stage 2: Injury classification (only if quality gate passed)
+
+        If `result` is provided it is a precomputed classification Results
+        object (from a batched forward pass) and the model is not re-run.
+        """
+        if not pose_result.quality_gate_passed:
+            return InjuryResult(
+                success=False,
+                error='Skipped due to insufficient pose quality',
+                skipped=True
+            )
+
         try:
-            results = self.injury_model(image_path, verbose=False)
-            
-            if not results or len(results) == 0:
-                return {
-                    'success': False,
-                    'stage': 'injury_classification',
-                    'error': 'No classification results'
-                }
-            
-            result = results[0]
-            
-            # Extract classification results
-            if hasattr(result, 'probs') and result.probs is not None:
-                names = result.names  # {0: 'healthy', 1: 'injured'} or similar
-                probs = result.probs
-                
-                # Get predicted class and confidence
-                pred_class_idx = probs.top1
-                pred_class_name = names[pred_class_idx]
-                confidence = float(probs.top1conf.item())
-                
-                # Get all class probabilities
-                all_probs = {names[i]: float(probs.data[i].item()) for i in range(len(names))}
-                
-                return {
-                    'success': True,
-                    'stage': 'injury_classification',
-                    'classification': pred_class_name,
-                    'confidence': confidence,
-                    'probabilities': all_probs
-                }
-            else:
-                return {
-                    'success': False,
-                    'stage': 'injury_classification',
-                    'error': 'No classification probabilities available'
-                }
-                
+            if result is None:
+                results = self.injury_model(image_path, verbose=False)
+
+                if not results or len(results) == 0:
+                    return InjuryResult(success=False, error='No classification results')
+
+                result = results[0]
+
+            return self._process_injury_result(result)
+
         except Exception as e:
-            return {
-                'success': False,
-                'stage': 'injury_classification',
-                'error': str(e)
-            }
+            return InjuryResult(success=False, error=str(e))
+
+    def _process_injury_result(self, result) -> InjuryResult:
+        """Extract classification and probabilities from a classification Results object"""
+        if hasattr(result, 'probs') and result.probs is not None:
+            names = result.names  # {0: 'healthy', 1: 'injured'} or similar
+            probs = result.probs
+
+            # One device->host transfer for the whole probability vector -
+            # calling .item() per class triggers a separate sync each time
+            probs_list = probs.data.cpu().numpy().tolist()
+
+            # Get predicted class and confidence
+            pred_class_idx = probs.top1
+            pred_class_name = names[pred_class_idx]
+            confidence = probs_list[pred_class_idx]
+
+            # Get all class probabilities
+            all_probs = {names[i]: probs_list[i] for i in range(len(names))}
+
+            return InjuryResult(
+                success=True,
+                classification=pred_class_name,
+                confidence=confidence,
+                probabilities=all_probs
+            )
+        else:
+            return InjuryResult(success=False, error='No classification probabilities available')
     
-    def stage3_combined_analysis(self, pose_result: Dict, injury_result: Dict) -> Dict:
+    def stage3_combined_analysis(self, pose_result: PoseResult, injury_result: InjuryResult) -> Dict:
         """Stage 3: Combined analysis and recommendations"""
         analysis = {
             'stage': 'combined_analysis',
-            'pose_detection': pose_result,
-            'injury_classification': injury_result,
+            'pose_detection': pose_result.to_dict(),
+            'injury_classification': injury_result.to_dict(),
             'overall_status': 'incomplete',
             'recommendations': []
         }
-        
+
         # Determine overall analysis status
-        if not pose_result.get('success', False):
+        if not pose_result.success:
             analysis.update({
                 'overall_status': 'pose_detection_failed',
                 'primary_issue': 'Unable to detect rooster pose',
@@ -211,11 +496,11 @@ class SequentialAnalyzer:
             })
             return analysis
         
-        if not pose_result.get('quality_gate_passed', False):
+        if not pose_result.quality_gate_passed:
             analysis.update({
                 'overall_status': 'insufficient_quality',
                 'primary_issue': 'Pose detection quality too low for reliable injury analysis',
-                'pose_confidence': pose_result.get('pose_confidence', 0),
+                'pose_confidence': pose_result.pose_confidence,
                 'quality_threshold': POSE_CONFIDENCE_THRESHOLD,
                 'recommendations': [
                     'Improve image quality (lighting, focus, angle)',
@@ -226,7 +511,7 @@ class SequentialAnalyzer:
             })
             return analysis
         
-        if injury_result.get('skipped', False):
+        if injury_result.skipped:
             analysis.update({
                 'overall_status': 'injury_analysis_skipped',
                 'primary_issue': 'Injury analysis skipped due to pose quality',
@@ -234,7 +519,7 @@ class SequentialAnalyzer:
             })
             return analysis
         
-        if not injury_result.get('success', False):
+        if not injury_result.success:
             analysis.update({
                 'overall_status': 'injury_classification_failed',
                 'primary_issue': 'Injury classification failed',
@@ -246,9 +531,9 @@ class SequentialAnalyzer:
             return analysis
         
         # Both stages successful - complete analysis
-        classification = injury_result.get('classification', 'unknown')
-        injury_confidence = injury_result.get('confidence', 0)
-        pose_confidence = pose_result.get('pose_confidence', 0)
+        classification = injury_result.classification or 'unknown'
+        injury_confidence = injury_result.confidence
+        pose_confidence = pose_result.pose_confidence
         combined_confidence = (pose_confidence + injury_confidence) / 2
         
         analysis.update({
@@ -262,81 +547,20 @@ class SequentialAnalyzer:
         })
         
         # Generate specific recommendations based on results
-        if classification == 'bumblefoot':
-            analysis['recommendations'] = [
-                'BUMBLEFOOT DETECTED - Immediate attention required',
-                'Examine foot pads for swelling, heat, or black scabs',
-                'Check for limping or favoring one foot',
-                'Isolate bird to prevent spread and allow treatment',
-                'Consult veterinarian for proper bumblefoot treatment',
-                'Clean and disinfect coop areas, especially perches',
-                'Review perch design - avoid sharp edges or rough surfaces'
-            ]
-            analysis['specific_findings'] = ['Bumblefoot detected in foot area']
-            
-        elif classification == 'comb_injury':
-            analysis['recommendations'] = [
-                '🐓 COMB/WATTLE INJURY DETECTED - Attention required',
-                'Examine comb and wattles for wounds, tears, or bleeding',
-                'Check for signs of fighting or pecking from other birds',
-                'Clean wounds with antiseptic solution',
-                'Apply antibiotic ointment to prevent infection',
-                'Isolate bird if injury is severe or bleeding',
-                'Monitor for signs of infection (swelling, pus, heat)',
-                'Consult veterinarian if injury does not improve in 2-3 days'
-            ]
-            analysis['specific_findings'] = ['Head/comb area shows abnormalities']
-            
-        elif classification == 'feather_loss':
-            analysis['recommendations'] = [
-                '🪶 FEATHER LOSS DETECTED - Investigation needed',
-                'Check for external parasites (mites, lice)',
-                'Examine for signs of pecking or bullying from flock mates',
-                'Assess nutrition - ensure adequate protein (16-20%)',
-                'Consider molting season (normal seasonal feather loss)',
-                'Check for skin irritation or infection under bare patches',
-                'Improve coop ventilation and reduce stress factors',
-                'Provide dust bath area for parasite control',
-                'Consult veterinarian if feather loss is severe or spreading'
-            ]
-            analysis['specific_findings'] = ['Visible feather loss or bare patches detected']
-            
-        elif classification == 'wing_injury':
-            analysis['recommendations'] = [
-                'WING INJURY DETECTED - Immediate attention required',
-                'Check for wing drooping, asymmetry, or limited movement',
-                'Examine wing joints for swelling, heat, or pain',
-                'Look for fractures, dislocations, or sprains',
-                'Restrict movement - confine to small, quiet area',
-                'Avoid handling the injured wing excessively',
-                'Consult veterinarian for proper diagnosis and treatment',
-                'May require splinting or bandaging by professional',
-                'Monitor for signs of infection or worsening condition'
-            ]
-            
+        recommendations = RECOMMENDATIONS.get(classification, RECOMMENDATIONS['healthy'])
+        analysis['recommendations'] = list(recommendations)
+        analysis['specific_findings'] = [FINDINGS.get(classification, FINDINGS['healthy'])]
+
+        if classification == 'wing_injury':
             # Add pose-specific insights for wing injury
-            pose_insights = self._analyze_pose_for_injuries(pose_result.get('keypoints', []))
+            pose_insights = self._analyze_pose_for_injuries(pose_result.keypoints_data)
             if pose_insights:
                 analysis['specific_findings'] = pose_insights
                 analysis['recommendations'].extend([
                     f'Pose analysis confirms: {", ".join(pose_insights)}',
                     'Wing asymmetry detected in pose analysis'
                 ])
-            else:
-                analysis['specific_findings'] = ['Wing abnormality detected']
-                
-        else:  # healthy
-            analysis['recommendations'] = [
-                'Rooster appears healthy based on AI analysis',
-                'Continue regular health monitoring',
-                'Maintain good nutrition and housing conditions',
-                'Schedule routine veterinary check-ups',
-                'Monitor for early signs of injury or illness',
-                'Ensure clean water and balanced diet',
-                'Provide adequate space and enrichment'
-            ]
-            analysis['specific_findings'] = ['No visible health issues detected']
-        
+
         return analysis
     
     def _assess_pose_quality(self, confidence: float, keypoints_detected: int) -> str:
@@ -352,167 +576,363 @@ class SequentialAnalyzer:
         else:
             return 'poor'
     
-    def _analyze_pose_for_injuries(self, keypoints: List[Dict]) -> List[str]:
-        """Analyze pose keypoints for specific injury indicators"""
+    def _analyze_pose_for_injuries(self, keypoints_data: Optional[np.ndarray]) -> List[str]:
+        """Analyze raw pose keypoints for specific injury indicators
+
+        Takes the [17, 3] array straight from pose processing - keypoint
+        positions are fixed by KEYPOINT_NAMES, so the geometric kernel indexes
+        them directly instead of going through a name-keyed dict.
+        """
         findings = []
-        
-        if not keypoints:
+
+        if keypoints_data is None or len(keypoints_data) == 0:
             return findings
-        
-        # Convert to dict for easier access
-        kp_dict = {kp['name']: kp for kp in keypoints if kp['confidence'] > 0.5}
-        
-        # Check wing symmetry
-        left_wing_tip = kp_dict.get('left_wing_tip')
-        right_wing_tip = kp_dict.get('right_wing_tip')
-        chest = kp_dict.get('chest')
-        
-        if left_wing_tip and right_wing_tip and chest:
-            left_wing_drop = left_wing_tip['y'] - chest['y']
-            right_wing_drop = right_wing_tip['y'] - chest['y']
-            wing_asymmetry = abs(left_wing_drop - right_wing_drop)
-            
-            if wing_asymmetry > 30:  # pixels
-                findings.append('wing asymmetry detected')
-        
-        # Check leg positioning
-        left_foot = kp_dict.get('left_foot')
-        right_foot = kp_dict.get('right_foot')
-        
-        if left_foot and right_foot:
-            foot_height_diff = abs(left_foot['y'] - right_foot['y'])
-            if foot_height_diff > 25:  # pixels
-                findings.append('uneven leg positioning')
-        
+
+        kp = np.asarray(keypoints_data, dtype=np.float32)[:len(KEYPOINT_NAMES)]
+        if kp.shape[0] < len(KEYPOINT_NAMES):
+            # Pad missing keypoints with zero confidence so the checks skip them
+            pad = np.zeros((len(KEYPOINT_NAMES) - kp.shape[0], 3), dtype=np.float32)
+            kp = np.vstack([kp, pad])
+
+        kp_xy = np.ascontiguousarray(kp[np.newaxis, :, :2])
+        kp_conf = np.ascontiguousarray(kp[np.newaxis, :, 2])
+
+        wing_asymmetry, uneven_legs = _pose_injury_flags(kp_xy, kp_conf)
+
+        if wing_asymmetry[0]:
+            findings.append('wing asymmetry detected')
+        if uneven_legs[0]:
+            findings.append('uneven leg positioning')
+
         return findings
     
+    def _load_image(self, image_path: str):
+        """Read, hash and decode one image (runs on the prefetch pool)
+
+        Returns (image, timestamp, cache_key); cache_key is None when the
+        file could not be read.
+        """
+        try:
+            with open(image_path, 'rb') as f:
+                raw = f.read()
+            timestamp = f'{os.stat(image_path).st_mtime_ns * 1e-9:.6f}'
+        except OSError:
+            return None, '', None
+
+        key = hashlib.blake2b(raw, digest_size=16).digest()
+        im = cv2.imdecode(np.frombuffer(raw, np.uint8), cv2.IMREAD_COLOR)
+        return im, timestamp, key
+
     def analyze(self, image_path: str) -> Dict:
         """Run complete sequential analysis with adaptive fallback"""
-        if not self.load_models():
-            return {'success': False, 'error': 'Failed to load models'}
-        
-        # Stage 1: Pose Detection
-        pose_result = self.stage1_pose_detection(image_path)
-        
+        return self.analyze_batch([image_path])[0]
+
+    def analyze_batch(self, image_paths: List[str]) -> List[Dict]:
+        """Run sequential analysis on a batch of images with shared forward passes
+
+        Both YOLO models accept list inputs, so one forward pass covers the
+        whole batch - at batch=1 the GPU is heavily under-utilized.
+        """
+        if not self.models_loaded:
+            return [{'success': False, 'error': 'Failed to load models'} for _ in image_paths]
+
+        # Ingress: read, hash and decode every image of the batch in parallel
+        # on the prefetch pool, then sort hits from the LRU cache. Decoding
+        # once per image (rather than passing paths) also stops ultralytics
+        # re-reading and re-decoding every JPEG per model.
+        loaded = list(self._decode_pool.map(self._load_image, image_paths))
+
+        results = {}
+        pending = []      # original indices still needing inference
+        images = []       # decoded arrays, parallel to `pending`
+        timestamps = {}
+        cache_keys = {}
+        for i, (image_path, (im, timestamp, key)) in enumerate(zip(image_paths, loaded)):
+            timestamps[i] = timestamp
+
+            # Unreadable or undecodable files fail on their own instead of
+            # joining the shared forward pass - one corrupt upload would make
+            # ultralytics abort the whole batched call, failing every other
+            # request gathered in the same window
+            if key is None:
+                results[i] = self._finalize(
+                    image_path,
+                    PoseResult(success=False, error=f'Unable to read image file: {image_path}'),
+                    None, timestamp
+                )
+                continue
+
+            cached = self._cache.get(key)
+            if cached is not None:
+                self._cache.move_to_end(key)
+                hit = dict(cached)
+                hit['timestamp'] = timestamp
+                results[i] = hit
+                continue
+
+            if im is None:
+                results[i] = self._finalize(
+                    image_path,
+                    PoseResult(success=False, error=f'Failed to decode image: {image_path}'),
+                    None, timestamp
+                )
+                continue
+
+            pending.append(i)
+            images.append(im)
+            cache_keys[i] = key
+
+        if not pending:
+            return [results[i] for i in range(len(image_paths))]
+
+        # Stage 1: Pose Detection (one batched forward pass). On GPU hosts the
+        # injury pass is launched speculatively on its own CUDA stream so both
+        # small models overlap instead of running strictly serial; the wasted
+        # pass for images that skip Stage 2 is cheaper than the serialization.
+        speculative_results = None
+        pose_error = None
+        if self.pose_stream is not None:
+            container = {}
+
+            def run_speculative_injury():
+                try:
+                    # inference_mode is thread-local, so re-enter it here
+                    with torch.inference_mode(), torch.cuda.stream(self.injury_stream):
+                        container['results'] = self.injury_model(images, verbose=False)
+                except Exception:
+                    pass  # Per-image handling falls back to sequential validation
+
+            injury_thread = threading.Thread(target=run_speculative_injury)
+            injury_thread.start()
+            try:
+                with torch.inference_mode(), torch.cuda.stream(self.pose_stream):
+                    pose_results = self.pose_model(images, verbose=False)
+            except Exception as e:
+                pose_error = e
+            injury_thread.join()
+            torch.cuda.synchronize()
+            speculative_results = container.get('results')
+        else:
+            try:
+                with torch.inference_mode():
+                    pose_results = self.pose_model(images, verbose=False)
+            except Exception as e:
+                pose_error = e
+
+        if pose_error is None:
+            pose_results_processed = [self._process_pose_result(r) for r in pose_results]
+        else:
+            pose_results_processed = [
+                PoseResult(success=False, error=str(pose_error)) for _ in pending
+            ]
+
+        # Decide which images need the injury model: gate passes run the normal
+        # Stage 2, complete pose failures take the adaptive close-up path
+        # (indices here are positions within the pending batch)
+        injury_indices = []
+        for j, pose_result in enumerate(pose_results_processed):
+            pose_failed = not pose_result.success
+            no_keypoints = pose_result.keypoints_detected == 0
+            if pose_failed or no_keypoints or pose_result.quality_gate_passed:
+                injury_indices.append(j)
+
+        # Injury classification: reuse the speculative results when they exist,
+        # otherwise run one batched forward pass over the images that need it
+        injury_raw = {}
+        if speculative_results is not None:
+            injury_raw = {j: speculative_results[j] for j in injury_indices}
+        elif injury_indices:
+            try:
+                with torch.inference_mode():
+                    injury_results = self.injury_model([images[j] for j in injury_indices], verbose=False)
+                injury_raw = dict(zip(injury_indices, injury_results))
+            except Exception:
+                pass  # Per-image handling falls back to sequential validation
+
+        for j, i in enumerate(pending):
+            result = self._finalize(
+                image_paths[i], pose_results_processed[j], injury_raw.get(j), timestamps[i]
+            )
+            results[i] = result
+
+            # Only completed analyses are worth caching; transient failures
+            # should be retried on re-request. The top-level 'success' flag is
+            # not usable here - _finalize sets it True even when a model
+            # raised (overall_status 'pose_detection_failed' etc.), and both
+            # the sequential and close-up happy paths end in 'analysis_complete'.
+            key = cache_keys.get(i)
+            if key is not None and result.get('overall_status') == 'analysis_complete':
+                self._cache[key] = result
+                if len(self._cache) > CACHE_SIZE:
+                    self._cache.popitem(last=False)
+
+        return [results[i] for i in range(len(image_paths))]
+
+    def _finalize(self, image_path: str, pose_result: PoseResult, injury_raw, timestamp: str) -> Dict:
+        """Assemble the final result for one image from precomputed model outputs"""
         # ADAPTIVE LOGIC: Check if pose detection failed completely
-        pose_failed = not pose_result.get('success', False)
-        no_keypoints = pose_result.get('keypoints_detected', 0) == 0
-        
+        pose_failed = not pose_result.success
+        no_keypoints = pose_result.keypoints_detected == 0
+
         # If pose detection completely failed, try direct injury classification
         if pose_failed or no_keypoints:
-            # Direct injury classification (close-up mode)
+            # Direct injury classification (close-up mode), reusing the cached
+            # Results object so the injury model runs at most once per image
             try:
-                results = self.injury_model(image_path)
-                if results and len(results) > 0:
-                    result = results[0]
-                    if hasattr(result, 'probs') and result.probs is not None:
-                        names = result.names
-                        probs = result.probs
-                        pred_class_idx = probs.top1
-                        pred_class_name = names[pred_class_idx]
-                        confidence = float(probs.top1conf.item())
-                        all_probs = {names[i]: float(probs.data[i].item()) for i in range(len(names))}
-                        
+                if injury_raw is not None:
+                    injury_result = self._process_injury_result(injury_raw)
+                    if injury_result.success:
+                        pred_class_name = injury_result.classification
+
                         # Return direct classification result
                         return {
                             'success': True,
                             'analysis_type': 'direct_classification',
                             'analysis_mode': 'close_up',
-                            'timestamp': str(Path(image_path).stat().st_mtime),
+                            'timestamp': timestamp,
                             'stage': 'injury_classification_only',
                             'pose_detection': {
                                 'success': False,
                                 'note': 'Skipped - close-up image detected'
                             },
-                            'injury_classification': {
-                                'success': True,
-                                'classification': pred_class_name,
-                                'confidence': confidence,
-                                'probabilities': all_probs
-                            },
+                            'injury_classification': injury_result.to_dict(),
                             'overall_status': 'analysis_complete',
                             'health_assessment': pred_class_name,
-                            'combined_confidence': confidence,
-                            'recommendations': self._get_recommendations_for_class(pred_class_name),
+                            'combined_confidence': injury_result.confidence,
+                            'recommendations': list(RECOMMENDATIONS.get(pred_class_name, RECOMMENDATIONS['healthy'])),
                             'specific_findings': [f'{pred_class_name.replace("_", " ").title()} detected in close-up analysis']
                         }
             except Exception as e:
                 pass  # Fall through to normal sequential validation
-        
+
         # Stage 2: Injury Classification (conditional - normal sequential flow)
-        injury_result = self.stage2_injury_classification(image_path, pose_result)
-        
+        injury_result = self.stage2_injury_classification(image_path, pose_result, result=injury_raw)
+
         # Stage 3: Combined Analysis
         combined_result = self.stage3_combined_analysis(pose_result, injury_result)
-        
+
         return {
             'success': True,
             'analysis_type': 'sequential_validation',
             'analysis_mode': 'full_body',
-            'timestamp': str(Path(image_path).stat().st_mtime),
+            'timestamp': timestamp,
             **combined_result
         }
     
-    def _get_recommendations_for_class(self, classification: str) -> list:
-        """Get recommendations for a specific injury class"""
-        if classification == 'bumblefoot':
-            return [
-                'BUMBLEFOOT DETECTED - Immediate attention required',
-                'Examine foot pads for swelling, heat, or black scabs',
-                'Check for limping or favoring one foot',
-                'Isolate bird to prevent spread and allow treatment',
-                'Consult veterinarian for proper bumblefoot treatment',
-                'Clean and disinfect coop areas, especially perches',
-                'Review perch design - avoid sharp edges or rough surfaces'
-            ]
-        elif classification == 'comb_injury':
-            return [
-                'COMB/WATTLE INJURY DETECTED - Attention required',
-                'Examine comb and wattles for wounds, tears, or bleeding',
-                'Check for signs of fighting or pecking from other birds',
-                'Clean wounds with antiseptic solution',
-                'Apply antibiotic ointment to prevent infection',
-                'Consult veterinarian if injury does not improve in 2-3 days'
-            ]
-        elif classification == 'feather_loss':
-            return [
-                'FEATHER LOSS DETECTED - Investigation needed',
-                'Check for external parasites (mites, lice)',
-                'Examine for signs of pecking or bullying from flock mates',
-                'Assess nutrition - ensure adequate protein (16-20%)',
-                'Consider molting season (normal seasonal feather loss)',
-                'Consult veterinarian if feather loss is severe or spreading'
-            ]
-        elif classification == 'wing_injury':
-            return [
-                'WING INJURY DETECTED - Immediate attention required',
-                'Check for wing drooping, asymmetry, or limited movement',
-                'Examine wing joints for swelling, heat, or pain',
-                'Restrict movement - confine to small, quiet area',
-                'Consult veterinarian for proper diagnosis and treatment'
-            ]
-        else:  # healthy
-            return [
-                'Rooster appears healthy based on AI analysis',
-                'Continue regular health monitoring',
-                'Maintain good nutrition and housing conditions',
-                'Monitor for early signs of injury or illness'
-            ]
+
+def dumps_result(result: Dict) -> bytes:
+    """Serialize one result to compact JSON bytes
+
+    orjson is ~5-10x faster than stdlib json for payloads this size and
+    handles NumPy scalars directly; the Node consumer parses the payload as
+    JSON, so indentation would be pure waste on this path.
+    """
+    if orjson is not None:
+        return orjson.dumps(result, option=orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(result).encode()
+
+
+def emit_result(result: Dict, flush: bool = True):
+    """Write one result to stdout as a length-prefixed frame
+
+    4-byte big-endian payload length followed by the JSON bytes. Framing lets
+    the Node consumer slice responses without scanning for delimiters, and
+    the flush can be deferred so a whole batch costs one write syscall.
+    """
+    payload = dumps_result(result)
+    sys.stdout.buffer.write(len(payload).to_bytes(4, 'big'))
+    sys.stdout.buffer.write(payload)
+    if flush:
+        sys.stdout.buffer.flush()
+
+
+def serve(analyzer: SequentialAnalyzer):
+    """Worker mode: read image paths from stdin, emit one framed JSON result each.
+
+    The Node backend spawns this once at boot, keeps the stdin pipe open and
+    dispatches requests to it - the models stay loaded for the process lifetime.
+
+    Requests that arrive within MAX_WAIT_MS of each other are gathered (up to
+    MAX_BATCH) and run through each model in a single batched forward pass;
+    results are emitted in arrival order so the consumer can match them FIFO.
+    """
+    requests: queue.Queue = queue.Queue()
+
+    def read_stdin():
+        for line in sys.stdin:
+            requests.put(line.strip())
+        requests.put(None)  # EOF sentinel
+
+    threading.Thread(target=read_stdin, daemon=True).start()
+
+    closing = False
+    while not closing:
+        item = requests.get()
+        if item is None:
+            break
+
+        # Gather a batch: drain whatever is queued, waiting briefly for more
+        batch = [item]
+        deadline = time.monotonic() + MAX_WAIT_MS / 1000.0
+        while len(batch) < MAX_BATCH:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                item = requests.get(timeout=timeout)
+            except queue.Empty:
+                break
+            if item is None:
+                closing = True
+                break
+            batch.append(item)
+
+        # Partition out paths that can be answered without inference
+        results = {}
+        valid_paths = []
+        for i, image_path in enumerate(batch):
+            if not image_path:
+                results[i] = {'success': False, 'error': 'Empty image path'}
+            elif not os.path.exists(image_path):
+                results[i] = {
+                    'success': False,
+                    'error': f'Image file not found: {image_path}'
+                }
+            else:
+                valid_paths.append(i)
+
+        if valid_paths:
+            analyzed = analyzer.analyze_batch([batch[i] for i in valid_paths])
+            results.update(zip(valid_paths, analyzed))
+
+        # One flush per drained batch rather than per response
+        for i in range(len(batch)):
+            emit_result(results[i], flush=False)
+        sys.stdout.buffer.flush()
 
 
 def main():
     """Main entry point for command-line usage"""
+    if len(sys.argv) == 4 and sys.argv[1] == '--serve':
+        # Worker mode: python sequential_analysis.py --serve <pose_model> <injury_model>
+        analyzer = SequentialAnalyzer(sys.argv[2], sys.argv[3])
+        if not analyzer.models_loaded:
+            sys.exit(1)
+        analyzer.warmup()
+        serve(analyzer)
+        return
+
     if len(sys.argv) != 4:
         print(json.dumps({
             'success': False,
             'error': 'Usage: python sequential_analysis.py <image_path> <pose_model_path> <injury_model_path>'
         }))
         sys.exit(1)
-    
+
     image_path = sys.argv[1]
     pose_model_path = sys.argv[2]
     injury_model_path = sys.argv[3]
-    
+
     # Validate inputs
     if not os.path.exists(image_path):
         print(json.dumps({
@@ -520,11 +940,11 @@ def main():
             'error': f'Image file not found: {image_path}'
         }))
         sys.exit(1)
-    
+
     # Run sequential analysis
     analyzer = SequentialAnalyzer(pose_model_path, injury_model_path)
     result = analyzer.analyze(image_path)
-    
+
     # Output result as JSON
     print(json.dumps(result, indent=2))
 